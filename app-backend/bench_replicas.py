@@ -0,0 +1,136 @@
+"""Compares ReplicaClient policies against local stub model-api servers of different speeds.
+
+Each stub serves one request at a time, like model-api with its single Llama instance, so
+requests routed to a busy or slow replica queue behind it. Latencies come from a seeded
+RNG per replica and every policy is run once per seed, so results are reproducible up to
+thread scheduling.
+
+Usage: python bench_replicas.py [--requests 400] [--concurrency 8] [--seeds 5]
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from replica_client import ReplicaClient
+
+# (mean latency in seconds, probability of a +0.5s outlier) per stub replica.
+STUB_PROFILES = [(0.02, 0.01), (0.02, 0.01), (0.06, 0.02), (0.15, 0.05)]
+RUNS = [("round_robin", None), ("least_outstanding", None), ("p2c", None), ("p2c", 0.1)]
+
+
+class StubModelApi:
+    """A local HTTP server that answers /health, /ready and /predict like model-api.
+
+    The attributes can be changed while it runs: `ready=False` makes /ready return 503,
+    `error` makes /predict answer HTTP 200 with an error body, as model-api does, and
+    `status` makes /predict answer with that HTTP status instead.
+    """
+
+    def __init__(self, mean_latency=0.0, outlier_rate=0.0, seed=0):
+        self.mean_latency = mean_latency
+        self.outlier_rate = outlier_rate
+        self.ready = True
+        self.error = None
+        self.status = 200
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._slot = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def service_time(self):
+        delay = self._rng.expovariate(1 / self.mean_latency) if self.mean_latency else 0.0
+        if self._rng.random() < self.outlier_rate:
+            delay += 0.5
+        return delay
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/ready" and not stub.ready:
+                    self._reply(503, {"status": "loading"})
+                else:
+                    self._reply(200, {"status": "ready" if self.path == "/ready" else "ok"})
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with stub._slot:
+                    stub.calls += 1
+                    time.sleep(stub.service_time())
+                if stub.status != 200:
+                    self._reply(stub.status, {"detail": "stub status"})
+                elif stub.error:
+                    self._reply(200, {"error": stub.error})
+                else:
+                    self._reply(200, {"predictions": ["🔍 Drug Interaction Analysis"]})
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def run(urls, policy, n_requests, concurrency, seed, hedge_after=None):
+    client = ReplicaClient(urls, policy=policy, health_interval=None, hedge_after=hedge_after, seed=seed).start()
+    instances = [{"prompt": "What is the interaction between Warfarin and Aspirin?"}]
+
+    def one(_):
+        start = time.perf_counter()
+        client.predict(instances)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(n_requests)))
+    client.stop()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return pct(0.50), pct(0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seeds", type=int, default=5, help="Runs per policy, each with its own seed.")
+    args = parser.parse_args()
+
+    results = {run_args: [] for run_args in RUNS}
+    for seed in range(args.seeds):
+        for policy, hedge_after in RUNS:
+            # Fresh stubs per run so every policy sees the same latency sequence for a given seed.
+            stubs = [StubModelApi(mean, outliers, seed=seed * 100 + i) for i, (mean, outliers) in enumerate(STUB_PROFILES)]
+            results[(policy, hedge_after)].append(
+                run([s.url for s in stubs], policy, args.requests, args.concurrency, seed, hedge_after))
+            for stub in stubs:
+                stub.shutdown()
+
+    print(f"{args.seeds} runs x {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'policy':<24}{'p50 ms':>10}{'p99 min':>10}{'p99 med':>10}{'p99 max':>10}")
+    for (policy, hedge_after), runs in results.items():
+        label = policy + (f" +hedge {hedge_after}s" if hedge_after else "")
+        p50 = statistics.median(r[0] for r in runs)
+        p99s = [r[1] for r in runs]
+        print(f"{label:<24}{p50:>10.1f}{min(p99s):>10.1f}{statistics.median(p99s):>10.1f}{max(p99s):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("round_robin", "least_outstanding", "p2c")
+
+
+class Replica:
+    """One model-api server plus the bookkeeping the balancer needs for it."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        # A replica only takes traffic once a readiness probe has passed.
+        self.ready = False
+        # Earliest time the next probe may run after a failure.
+        self.ejected_until = 0.0
+
+
+class ReplicaError(RuntimeError):
+    """A replica answered, but without usable predictions."""
+
+
+class RequestFailed(RuntimeError):
+    """The request failed in a way that says nothing about the replica's health, so it isn't ejected or retried."""
+
+
+class ReplicaClient:
+    """Spreads /predict calls over several model-api replicas.
+
+    Replicas join the rotation once their readiness probe passes. A replica
+    that fails a request or a probe is taken out and is not probed again
+    until an exponential backoff expires; it rejoins only when that probe
+    passes. The backoff keeps growing until a /predict call succeeds, so a
+    replica that passes probes but fails real requests stays out longer each
+    time. Read timeouts and 4xx responses fail the request without ejecting
+    the replica or retrying elsewhere. If no replica is ready, requests go to
+    all of them rather than failing outright. If hedge_after is set, a slow request is duplicated to
+    a second replica after that many seconds and whichever answers first wins.
+    """
+
+    def __init__(self, urls, policy="p2c", timeout=65, health_path="/ready",
+                 health_interval=5.0, health_timeout=2.0, base_backoff=1.0,
+                 max_backoff=60.0, hedge_after=None, max_workers=32, seed=None):
+        if not urls:
+            raise ValueError("ReplicaClient needs at least one model-api URL.")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}, expected one of {POLICIES}")
+        self.replicas = [Replica(u) for u in urls]
+        self.policy = policy
+        self.timeout = timeout
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.hedge_after = hedge_after
+        self._lock = threading.Lock()
+        self._rr_index = 0
+        self._rng = random.Random(seed)
+        self._session = requests.Session()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._stop = threading.Event()
+        self._health_thread = None
+
+    # --- Health checking ---
+    def start(self):
+        # Probe once up front so traffic only goes to replicas that are already ready.
+        self.check_health()
+        if self._health_thread is None and self.health_interval:
+            self._health_thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._health_thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=self.health_timeout + 1)
+            self._health_thread = None
+        self._pool.shutdown(wait=False)
+
+    def _health_loop(self):
+        while not self._stop.is_set():
+            self.check_health()
+            self._stop.wait(self.health_interval)
+
+    def check_health(self):
+        now = time.monotonic()
+        for replica in self.replicas:
+            # Ejected replicas are only re-probed once their backoff has expired.
+            if now < replica.ejected_until:
+                continue
+            try:
+                resp = self._session.get(replica.url + self.health_path, timeout=self.health_timeout)
+                ok = resp.status_code == 200
+            except requests.exceptions.RequestException:
+                ok = False
+            if ok:
+                self._mark_ready(replica)
+            else:
+                self._mark_failure(replica)
+
+    def _mark_ready(self, replica):
+        # Keeps the failure count: only a successful /predict proves the replica can serve.
+        with self._lock:
+            if not replica.ready:
+                logger.info(f"Replica {replica.url} is ready.")
+            replica.ready = True
+            replica.ejected_until = 0.0
+
+    def _mark_success(self, replica):
+        with self._lock:
+            replica.failures = 0
+
+    def _mark_failure(self, replica):
+        with self._lock:
+            replica.ready = False
+            replica.failures += 1
+            backoff = min(self.base_backoff * 2 ** (replica.failures - 1), self.max_backoff)
+            replica.ejected_until = time.monotonic() + backoff
+        logger.warning(f"Ejecting replica {replica.url} for {backoff:.1f}s (failures={replica.failures}).")
+
+    # --- Selection ---
+    def _pick(self, exclude=()):
+        """Chooses a replica and reserves an outstanding slot on it."""
+        with self._lock:
+            candidates = [r for r in self.replicas if r not in exclude]
+            ready = [r for r in candidates if r.ready]
+            # If nothing is ready, fall back to the full set rather than failing outright.
+            pool = ready or candidates
+            if not pool:
+                return None
+            if self.policy == "round_robin":
+                replica = pool[self._rr_index % len(pool)]
+                self._rr_index += 1
+            elif self.policy == "least_outstanding":
+                fewest = min(r.outstanding for r in pool)
+                replica = self._rng.choice([r for r in pool if r.outstanding == fewest])
+            else:
+                a, b = self._rng.sample(pool, 2) if len(pool) > 1 else (pool[0], pool[0])
+                replica = a if a.outstanding <= b.outstanding else b
+            replica.outstanding += 1
+            return replica
+
+    # --- Requests ---
+    def _call(self, replica, instances):
+        try:
+            resp = self._session.post(replica.url + "/predict", json={"instances": instances},
+                                      timeout=self.timeout)
+            if 400 <= resp.status_code < 500:
+                raise RequestFailed(f"{replica.url} rejected the request: HTTP {resp.status_code} {resp.text[:200]}")
+            resp.raise_for_status()
+            result = resp.json()
+            # model-api reports failures as HTTP 200 with an 'error' body.
+            if not isinstance(result, dict) or "error" in result or not result.get("predictions"):
+                error = result.get("error") if isinstance(result, dict) else None
+                raise ReplicaError(f"{replica.url} returned no predictions: {error or result}")
+        except requests.exceptions.ReadTimeout as e:
+            # The replica is up but slow (e.g. a long generation on a CPU node), and is still working on it.
+            # Ejecting it or retrying elsewhere would only add load.
+            raise RequestFailed(f"{replica.url} did not answer within {self.timeout}s") from e
+        except (requests.exceptions.RequestException, ValueError, ReplicaError):
+            self._mark_failure(replica)
+            raise
+        finally:
+            with self._lock:
+                replica.outstanding -= 1
+        self._mark_success(replica)
+        return result
+
+    def predict(self, instances):
+        """Sends the instances to one replica (hedged if enabled) and returns the JSON body."""
+        tried = []
+        futures = {}
+        last_error = None
+        replica = self._pick()
+        if replica is None:
+            raise RuntimeError("No model-api replicas configured.")
+        tried.append(replica)
+        futures[self._pool.submit(self._call, replica, instances)] = replica
+        hedged = self.hedge_after is None
+        retryable = True
+
+        while futures:
+            timeout = None if hedged else self.hedge_after
+            done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary is slow: duplicate the request to another replica.
+                hedged = True
+                backup = self._pick(exclude=tried)
+                if backup is not None:
+                    tried.append(backup)
+                    futures[self._pool.submit(self._call, backup, instances)] = backup
+                continue
+            for future in done:
+                futures.pop(future)
+                try:
+                    return future.result()
+                except RequestFailed as e:
+                    last_error = e
+                    retryable = False
+                except Exception as e:
+                    last_error = e
+            if not futures and not retryable:
+                raise last_error
+            if not futures:
+                # Every in-flight attempt failed: retry once on a replica we haven't used.
+                retry = self._pick(exclude=tried) if len(tried) < 2 else None
+                if retry is not None:
+                    tried.append(retry)
+                    futures[self._pool.submit(self._call, retry, instances)] = retry
+        raise RuntimeError(f"All model-api replicas failed: {last_error}")
@@ -0,0 +1,178 @@
+import time
+
+import pytest
+
+from bench_replicas import StubModelApi
+from replica_client import ReplicaClient, RequestFailed
+
+INSTANCES = [{"prompt": "What is the interaction between Warfarin and Aspirin?"}]
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(n, **kwargs):
+        created.extend(StubModelApi(seed=i, **kwargs) for i in range(n))
+        return created[-n:]
+
+    yield make
+    for stub in created:
+        stub.shutdown()
+
+
+def make_client(stubs, **kwargs):
+    kwargs.setdefault("health_interval", None)
+    return ReplicaClient([s.url for s in stubs], seed=0, **kwargs).start()
+
+
+def test_error_body_ejects_replica_and_retries_elsewhere(stubs):
+    good, bad = stubs(2)
+    bad.error = "Failed to initialize LLM"
+    client = make_client([good, bad], policy="round_robin", base_backoff=60)
+    try:
+        for _ in range(6):
+            assert client.predict(INSTANCES) == {"predictions": ["🔍 Drug Interaction Analysis"]}
+        bad_replica = client.replicas[1]
+        assert not bad_replica.ready
+        assert bad_replica.failures == 1
+        assert bad.calls == 1
+    finally:
+        client.stop()
+
+
+def test_ejected_replica_waits_for_backoff_and_probe(stubs):
+    good, flaky = stubs(2)
+    flaky.error = "boom"
+    client = make_client([good, flaky], policy="round_robin", base_backoff=0.3)
+    replica = client.replicas[1]
+    try:
+        client.predict(INSTANCES)
+        client.predict(INSTANCES)
+        assert not replica.ready
+        first_backoff = replica.ejected_until - time.monotonic()
+        assert 0 < first_backoff <= 0.3
+
+        # Probe fails once the backoff expires: the backoff doubles.
+        flaky.ready = False
+        time.sleep(0.35)
+        client.check_health()
+        assert not replica.ready
+        assert replica.failures == 2
+        assert replica.ejected_until - time.monotonic() > 0.3
+
+        # Backoff still running: no probe, no traffic, even though the stub is fine again.
+        flaky.ready, flaky.error = True, None
+        client.check_health()
+        assert not replica.ready
+        calls = flaky.calls
+        for _ in range(4):
+            client.predict(INSTANCES)
+        assert flaky.calls == calls
+
+        # Backoff expired and the probe passes: the replica rejoins, and a successful request clears its failures.
+        time.sleep(0.65)
+        client.check_health()
+        assert replica.ready and replica.failures == 2
+        for _ in range(4):
+            client.predict(INSTANCES)
+        assert flaky.calls > calls
+        assert replica.failures == 0
+    finally:
+        client.stop()
+
+
+def test_unready_replica_gets_no_traffic(stubs):
+    ready, loading = stubs(2)
+    loading.ready = False
+    client = make_client([ready, loading], policy="round_robin")
+    try:
+        for _ in range(4):
+            client.predict(INSTANCES)
+        assert loading.calls == 0
+        assert ready.calls == 4
+    finally:
+        client.stop()
+
+
+def test_hedged_request_beats_slow_replica(stubs):
+    slow, fast = stubs(2)
+    slow.outlier_rate = 1.0  # Every request takes 0.5s.
+    client = make_client([slow, fast], policy="round_robin", hedge_after=0.05)
+    try:
+        start = time.perf_counter()
+        client.predict(INSTANCES)
+        assert time.perf_counter() - start < 0.4
+        assert slow.calls == 1 and fast.calls == 1
+    finally:
+        client.stop()
+
+
+def test_all_replicas_failing_raises(stubs):
+    a, b = stubs(2)
+    a.error = b.error = "Failed to initialize LLM"
+    client = make_client([a, b])
+    try:
+        with pytest.raises(RuntimeError, match="All model-api replicas failed"):
+            client.predict(INSTANCES)
+        assert all(not r.ready for r in client.replicas)
+    finally:
+        client.stop()
+
+
+def test_backoff_grows_when_probe_passes_but_predict_fails(stubs):
+    good, broken = stubs(2)
+    broken.error = "CUDA error"  # /ready keeps passing, /predict keeps failing.
+    client = make_client([good, broken], policy="round_robin", base_backoff=0.1)
+    replica = client.replicas[1]
+    try:
+        backoffs = []
+        for _ in range(3):
+            while replica.ready:
+                client.predict(INSTANCES)
+            backoffs.append(replica.ejected_until - time.monotonic())
+            time.sleep(backoffs[-1] + 0.02)
+            client.check_health()
+            assert replica.ready
+        assert replica.failures == 3
+        assert backoffs[0] < backoffs[1] < backoffs[2]
+        assert backoffs[2] > 0.3
+    finally:
+        client.stop()
+
+
+def test_read_timeout_fails_request_without_ejecting_or_retrying(stubs):
+    slow, fast = stubs(2)
+    slow.outlier_rate = 1.0  # Every request takes 0.5s.
+    client = make_client([slow, fast], policy="round_robin", timeout=0.1)
+    try:
+        with pytest.raises(RequestFailed, match="did not answer"):
+            client.predict(INSTANCES)
+        assert client.replicas[0].ready and client.replicas[0].failures == 0
+        assert fast.calls == 0
+    finally:
+        client.stop()
+
+
+def test_client_error_is_not_ejected_or_retried(stubs):
+    a, b = stubs(2)
+    a.status = b.status = 422
+    client = make_client([a, b], policy="round_robin")
+    try:
+        with pytest.raises(RequestFailed, match="HTTP 422"):
+            client.predict(INSTANCES)
+        assert all(r.ready and r.failures == 0 for r in client.replicas)
+        assert a.calls + b.calls == 1
+    finally:
+        client.stop()
+
+
+def test_server_error_ejects_and_retries(stubs):
+    broken, good = stubs(2)
+    broken.status = 500
+    client = make_client([broken, good], policy="round_robin", base_backoff=60)
+    try:
+        assert client.predict(INSTANCES)["predictions"]
+        assert not client.replicas[0].ready and good.calls == 1
+    finally:
+        client.stop()
@@ -0,0 +1,114 @@
+"""Writes a tiny random-weight Llama GGUF for exercising tune_llm.py on CPU without downloading a model.
+
+The weights are random, so the output is gibberish, but every llama.cpp code path the tuner measures
+(prefill, decode, KV cache types, mmap/mlock) runs for real. The vocabulary is built from the backend's
+prompts so prompt token counts stay in the same range as with the real Llama 3 tokenizer.
+
+Needs the `gguf` and `numpy` packages (pip install gguf numpy).
+Usage: python benchmarks/make_tiny_gguf.py [--out tiny-ddi-llama.f16.gguf]
+"""
+import os
+import re
+import sys
+import argparse
+
+import numpy as np
+import gguf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from tune_llm import DDI_QUESTIONS, DEFAULT_PROMPTS_MODULE, N_CTX, load_prompt_builder  # noqa: E402
+
+SPECIAL_TOKENS = ["<|begin_of_text|>", "<|end_of_text|>", "<|start_header_id|>", "<|end_header_id|>", "<|eot_id|>"]
+
+
+def build_vocab(texts):
+    """SentencePiece-style vocab: control tokens, byte fallback, characters, then every prefix of every word."""
+    tokens, scores, types = [], [], []
+
+    def add(piece, score, token_type):
+        if piece not in seen:
+            seen.add(piece)
+            tokens.append(piece)
+            scores.append(score)
+            types.append(token_type)
+
+    seen = set()
+    add("<unk>", 0.0, gguf.TokenType.UNKNOWN)
+    for special in SPECIAL_TOKENS:
+        add(special, 0.0, gguf.TokenType.CONTROL)
+    for byte in range(256):
+        add(f"<0x{byte:02X}>", 0.0, gguf.TokenType.BYTE)
+    text = " ".join(texts)
+    for char in sorted(set(text.replace(" ", "▁")) | {"▁"}):
+        add(char, -1000.0, gguf.TokenType.NORMAL)
+    # The SPM tokenizer merges adjacent pieces whose concatenation is in the vocab, so add every prefix.
+    for word in sorted(set(re.findall(r"\S+", text))):
+        piece = "▁" + word
+        for end in range(2, len(piece) + 1):
+            add(piece[:end], float(end), gguf.TokenType.NORMAL)
+    return tokens, scores, types
+
+
+def write_tiny_gguf(path, n_embd=512, n_layer=8, n_head=8, n_ff=1536, seed=0):
+    build_prompt = load_prompt_builder(DEFAULT_PROMPTS_MODULE)
+    tokens, scores, types = build_vocab([build_prompt(q) for q in DDI_QUESTIONS])
+    rng = np.random.default_rng(seed)
+
+    writer = gguf.GGUFWriter(path, "llama")
+    writer.add_name("tiny-ddi-llama (random weights)")
+    writer.add_context_length(N_CTX)
+    writer.add_embedding_length(n_embd)
+    writer.add_block_count(n_layer)
+    writer.add_feed_forward_length(n_ff)
+    writer.add_head_count(n_head)
+    writer.add_head_count_kv(n_head)
+    writer.add_rope_dimension_count(n_embd // n_head)
+    writer.add_layer_norm_rms_eps(1e-5)
+    writer.add_file_type(gguf.LlamaFileType.MOSTLY_F16)
+    writer.add_tokenizer_model("llama")
+    writer.add_token_list(tokens)
+    writer.add_token_scores(scores)
+    writer.add_token_types(types)
+    writer.add_bos_token_id(tokens.index("<|begin_of_text|>"))
+    writer.add_eos_token_id(tokens.index("<|eot_id|>"))
+    writer.add_unk_token_id(0)
+
+    def weight(*shape):
+        return (rng.standard_normal(shape) * 0.02).astype(np.float16)
+
+    n_vocab = len(tokens)
+    writer.add_tensor("token_embd.weight", weight(n_vocab, n_embd))
+    for i in range(n_layer):
+        writer.add_tensor(f"blk.{i}.attn_norm.weight", np.ones(n_embd, dtype=np.float32))
+        for name in ("attn_q", "attn_k", "attn_v", "attn_output"):
+            writer.add_tensor(f"blk.{i}.{name}.weight", weight(n_embd, n_embd))
+        writer.add_tensor(f"blk.{i}.ffn_norm.weight", np.ones(n_embd, dtype=np.float32))
+        writer.add_tensor(f"blk.{i}.ffn_gate.weight", weight(n_ff, n_embd))
+        writer.add_tensor(f"blk.{i}.ffn_up.weight", weight(n_ff, n_embd))
+        writer.add_tensor(f"blk.{i}.ffn_down.weight", weight(n_embd, n_ff))
+    writer.add_tensor("output_norm.weight", np.ones(n_embd, dtype=np.float32))
+    writer.add_tensor("output.weight", weight(n_vocab, n_embd))
+
+    writer.write_header_to_file()
+    writer.write_kv_data_to_file()
+    writer.write_tensors_to_file()
+    writer.close()
+    return n_vocab
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default="tiny-ddi-llama.f16.gguf")
+    parser.add_argument("--n-embd", type=int, default=512)
+    parser.add_argument("--n-layer", type=int, default=8)
+    parser.add_argument("--n-head", type=int, default=8)
+    parser.add_argument("--n-ff", type=int, default=1536)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n_vocab = write_tiny_gguf(args.out, args.n_embd, args.n_layer, args.n_head, args.n_ff, args.seed)
+    print(f"Wrote {args.out}: vocab {n_vocab}, {os.path.getsize(args.out) / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Written by tune_llm.py and picked up automatically by get_llm().
+DEFAULT_PROFILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llama_profile.json")
+
+# ggml type ids accepted by Llama(type_k=..., type_v=...).
+KV_CACHE_TYPES = {"f16": 1, "q4_0": 2, "q8_0": 8}
+
+# Settings the tuner is allowed to write; anything else in the file is ignored.
+TUNABLE_SETTINGS = ("n_threads", "n_threads_batch", "n_batch", "n_ubatch", "use_mmap", "use_mlock", "kv_cache_type")
+
+
+def profile_path():
+    return os.environ.get("LLAMA_PROFILE_PATH", DEFAULT_PROFILE_PATH)
+
+
+def detect_device(n_gpu_layers):
+    """Returns "gpu" if llama.cpp will offload layers on this host, else "cpu". LLAMA_DEVICE overrides it."""
+    if os.environ.get("LLAMA_DEVICE"):
+        return os.environ["LLAMA_DEVICE"]
+    if n_gpu_layers == 0:
+        return "cpu"
+    try:
+        import llama_cpp
+        return "gpu" if llama_cpp.llama_supports_gpu_offload() else "cpu"
+    except (ImportError, AttributeError):
+        return "cpu"
+
+
+def load_profile_settings(path=None, device="cpu", model=None):
+    """Returns the tuned settings from the profile file, or {} if there isn't one.
+
+    The profile is ignored unless it was tuned for the same device and CPU count as this host and,
+    when `model` (a GGUF file name) is given, for that same model.
+    """
+    path = path or profile_path()
+    if not os.path.exists(path):
+        logger.info(f"No llama.cpp tuning profile at {path}, using defaults.")
+        return {}
+    try:
+        with open(path) as f:
+            profile = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable tuning profile {path}: {e}")
+        return {}
+    if not isinstance(profile, dict) or not isinstance(profile.get("settings"), dict):
+        logger.warning(f"Ignoring tuning profile {path}: expected an object with a 'settings' object.")
+        return {}
+    if profile.get("device") != device:
+        logger.warning(f"Ignoring tuning profile {path}: tuned for device {profile.get('device')!r}, running on {device!r}.")
+        return {}
+    if model is not None and profile.get("model") != model:
+        logger.warning(f"Ignoring tuning profile {path}: tuned for model {profile.get('model')!r}, serving {model!r}.")
+        return {}
+    host = profile.get("host")
+    cpu_count = host.get("cpu_count") if isinstance(host, dict) else None
+    if cpu_count != os.cpu_count():
+        logger.warning(f"Ignoring tuning profile {path}: tuned on a host with {cpu_count} CPUs, this host has {os.cpu_count()}.")
+        return {}
+    settings = {k: v for k, v in profile["settings"].items() if k in TUNABLE_SETTINGS}
+    logger.info(f"Loaded llama.cpp tuning profile from {path}: {settings}")
+    return settings
+
+
+def llama_kwargs(settings):
+    """Translates profile settings into keyword arguments for llama_cpp.Llama."""
+    kwargs = dict(settings)
+    kv_cache_type = kwargs.pop("kv_cache_type", None)
+    if kv_cache_type:
+        if kv_cache_type not in KV_CACHE_TYPES:
+            raise ValueError(f"Unknown KV cache type {kv_cache_type!r}, expected one of {list(KV_CACHE_TYPES)}")
+        kwargs["type_k"] = kwargs["type_v"] = KV_CACHE_TYPES[kv_cache_type]
+        # llama.cpp only supports a quantized V cache with flash attention enabled.
+        if kv_cache_type != "f16":
+            kwargs["flash_attn"] = True
+    return kwargs
@@ -1,10 +1,14 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import os
 from llama_cpp import Llama
 from typing import List
 from google.cloud import storage
 import logging
+import threading
+import time
+from llama_profile import detect_device, load_profile_settings, llama_kwargs
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,6 +21,11 @@ class PredictionPayload(BaseModel):
 
 app = FastAPI()
 llm = None
+llm_error = None # Last model load failure, reported by /ready
+llm_lock = threading.Lock()
+# Backoff between model load attempts at startup, in seconds.
+LOAD_RETRY_DELAY = 5
+LOAD_RETRY_MAX_DELAY = 300
 
 def download_model_from_gcs():
     gcs_model_path = os.environ.get("GCS_MODEL_PATH") # e.g., "gs://llama3-ft-ddi-q8/unsloth.Q8_0.gguf"
@@ -107,26 +116,63 @@ def get_llm():
         llm = Llama(model_path=model_path, n_gpu_layers=35, verbose =True, n_ctx=4096)
     return llm '''
 
-# --- Function to initialize the LLM (called on demand) ---
+# --- Function to initialize the LLM (started at startup, or called on demand) ---
 def get_llm():
-    global llm
+    # The lock stops the startup warm-up and an early /predict from loading the model twice.
+    with llm_lock:
+        return _load_llm()
+
+def _load_llm():
+    global llm, llm_error
     if llm is None:
         try:
             local_model_path = download_model_from_gcs()
             logger.info(f"Loading model from {local_model_path}...")
             # Adjust n_gpu_layers as needed for your GPU. -1 tries to offload all.
-            llm = Llama(model_path=local_model_path, n_gpu_layers=-1, verbose=True, n_ctx=4096) 
+            # Host-specific settings from tune_llm.py (threads, batch sizes, KV cache type...) override the defaults,
+            # but only when the profile was tuned for this device; CPU-tuned settings are skipped on GPU nodes.
+            settings = {"n_gpu_layers": -1, "n_ctx": 4096}
+            settings.update(load_profile_settings(device=detect_device(settings["n_gpu_layers"]),
+                                                  model=os.path.basename(local_model_path)))
+            llm = Llama(model_path=local_model_path, verbose=True, **llama_kwargs(settings))
+            llm_error = None
             logger.info("Model loaded successfully.")
         except Exception as e:
+            llm_error = str(e)
             logger.error(f"Error initializing LLM: {e}")
             # Optionally handle this more gracefully, but raising often helps debug startup issues
             raise RuntimeError(f"Failed to initialize LLM: {e}") 
     return llm
 
+def _warm_up():
+    # Keep retrying so a transient GCS or disk problem at startup doesn't leave the replica unready for good.
+    # Failures are already logged and recorded in llm_error, which /ready reports meanwhile.
+    delay = LOAD_RETRY_DELAY
+    while llm is None:
+        try:
+            get_llm()
+        except RuntimeError:
+            logger.info(f"Retrying model load in {delay}s.")
+            time.sleep(delay)
+            delay = min(delay * 2, LOAD_RETRY_MAX_DELAY)
+
+@app.on_event('startup')
+def load_model_in_background():
+    # Load eagerly so /ready can tell load balancers when this replica can serve, without blocking /health.
+    threading.Thread(target=_warm_up, daemon=True).start()
+
 @app.get('/health')
 def health_check():
     return {'status': 'ok'}
 
+@app.get('/ready')
+def readiness_check():
+    if llm is not None:
+        return {'status': 'ready'}
+    if llm_error:
+        return JSONResponse(status_code=503, content={'status': 'error', 'error': llm_error})
+    return JSONResponse(status_code=503, content={'status': 'loading'})
+
 @app.post('/predict')
 def predict(payload: PredictionPayload):
     try:
@@ -0,0 +1,67 @@
+import sys
+import json
+import types
+
+import pytest
+
+try:
+    import llama_cpp  # noqa: F401
+except ImportError:
+    sys.modules["llama_cpp"] = types.SimpleNamespace(Llama=None, __version__="fake")
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def unloaded_model(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "llm", None)
+    monkeypatch.setattr(main, "llm_error", None)
+    monkeypatch.setattr(main, "download_model_from_gcs", lambda: str(tmp_path / "unsloth.Q8_0.gguf"))
+    monkeypatch.setenv("LLAMA_PROFILE_PATH", str(tmp_path / "missing_profile.json"))
+
+
+def ready_status():
+    response = main.readiness_check()
+    if isinstance(response, dict):
+        return 200, response
+    return response.status_code, json.loads(response.body)
+
+
+def test_warm_up_retries_failed_load_until_ready(monkeypatch):
+    attempts, sleeps, probes = [], [], []
+
+    def flaky_llama(model_path, **kwargs):
+        attempts.append(model_path)
+        if len(attempts) < 3:
+            raise OSError("GCS download interrupted")
+        return object()
+
+    def record_sleep(delay):
+        sleeps.append(delay)
+        probes.append(ready_status())
+
+    monkeypatch.setattr(main, "Llama", flaky_llama)
+    monkeypatch.setattr(main.time, "sleep", record_sleep)
+    assert ready_status() == (503, {"status": "loading"})
+
+    main._warm_up()
+
+    assert len(attempts) == 3
+    assert sleeps == [main.LOAD_RETRY_DELAY, main.LOAD_RETRY_DELAY * 2]
+    assert all(status == 503 and body["status"] == "error" for status, body in probes)
+    assert "GCS download interrupted" in probes[0][1]["error"]
+    assert ready_status() == (200, {"status": "ready"})
+
+
+def test_warm_up_backoff_is_capped(monkeypatch):
+    sleeps = []
+
+    def failing_llama(model_path, **kwargs):
+        if len(sleeps) == 8:
+            return object()
+        raise OSError("disk full")
+
+    monkeypatch.setattr(main, "Llama", failing_llama)
+    monkeypatch.setattr(main.time, "sleep", sleeps.append)
+    main._warm_up()
+    assert max(sleeps) == main.LOAD_RETRY_MAX_DELAY
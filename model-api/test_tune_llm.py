@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import queue
+import types
+
+import pytest
+
+import tune_llm
+from llama_profile import KV_CACHE_TYPES, llama_kwargs, load_profile_settings
+
+EOS = 2
+
+
+class FakeLlama:
+    """Stands in for llama_cpp.Llama: one token per whitespace-separated word, greedy output hits EOS after 10 tokens."""
+
+    instances = []
+
+    def __init__(self, model_path, **kwargs):
+        self.model_path = model_path
+        self.kwargs = kwargs
+        self.n_tokens = 0
+        FakeLlama.instances.append(self)
+
+    def tokenize(self, text, add_bos=True, special=False):
+        return [1] * (len(text.split()) + int(add_bos))
+
+    def reset(self):
+        self.n_tokens = 0
+
+    def eval(self, tokens):
+        self.n_tokens += len(tokens)
+
+    def sample(self, temp=0.8):
+        assert temp == 0.0
+        self._generated = getattr(self, "_generated", 0) + 1
+        return EOS if self._generated % 11 == 0 else 5
+
+    def token_eos(self):
+        return EOS
+
+
+@pytest.fixture
+def fake_llama_cpp(monkeypatch):
+    FakeLlama.instances = []
+    monkeypatch.setitem(sys.modules, "llama_cpp", types.SimpleNamespace(Llama=FakeLlama, __version__="fake"))
+    return FakeLlama
+
+
+@pytest.fixture
+def prompts():
+    build_prompt = tune_llm.load_prompt_builder(tune_llm.DEFAULT_PROMPTS_MODULE)
+    return [build_prompt(q) for q in tune_llm.DDI_QUESTIONS]
+
+
+def grid_args(**overrides):
+    args = dict(threads=[4, 8], threads_batch=[8], n_batch=[256, 512], n_ubatch=[128, 512],
+                kv_cache=["f16", "q8_0"], memory=["mmap", "mlock"])
+    args.update(overrides)
+    return types.SimpleNamespace(**args)
+
+
+def write_profile(tmp_path, profile):
+    path = tmp_path / "llama_profile.json"
+    path.write_text(json.dumps(profile))
+    return str(path)
+
+
+def test_build_grid_skips_ubatch_larger_than_batch():
+    grid = tune_llm.build_grid(grid_args())
+    # n_batch/n_ubatch pairs: (256, 128), (512, 128), (512, 512).
+    assert len(grid) == 2 * 3 * 2 * 2
+    assert all(c["n_ubatch"] <= c["n_batch"] for c in grid)
+    assert {(c["use_mmap"], c["use_mlock"]) for c in grid} == {(True, False), (True, True)}
+
+
+def test_score_weights_prefill_and_decode():
+    result = {"prompt_tokens": 1000, "prefill_tokens_per_s": 100.0, "decode_tokens_per_s": 10.0}
+    assert tune_llm.score(result, output_tokens=300) == pytest.approx(10 + 30)
+    assert tune_llm.score(dict(result, decode_tokens_per_s=0.0), 300) > 1e9
+
+
+def test_llama_kwargs_maps_kv_cache_type():
+    assert llama_kwargs({"n_threads": 4, "kv_cache_type": "f16"}) == {
+        "n_threads": 4, "type_k": KV_CACHE_TYPES["f16"], "type_v": KV_CACHE_TYPES["f16"]}
+    quantized = llama_kwargs({"kv_cache_type": "q8_0"})
+    assert quantized["type_k"] == quantized["type_v"] == KV_CACHE_TYPES["q8_0"]
+    assert quantized["flash_attn"] is True
+    with pytest.raises(ValueError):
+        llama_kwargs({"kv_cache_type": "q3_k"})
+
+
+def test_benchmark_prompts_match_backend_prompt(prompts):
+    # Prefill must be measured on the full backend system prompt, not a shortened copy.
+    assert all(len(p) > 4000 for p in prompts)
+    assert all("--- START TEMPLATE ---" in p for p in prompts)
+
+
+def test_benchmark_config_with_fake_llama(fake_llama_cpp, prompts):
+    settings = tune_llm.build_grid(grid_args(threads=[4], n_batch=[512], n_ubatch=[512], kv_cache=["q8_0"], memory=["mmap"]))[0]
+    results = queue.Queue()
+    tune_llm.benchmark_config("model.gguf", settings, prompts, decode_tokens=64, repeats=2, queue=results)
+    result = results.get_nowait()
+
+    assert "error" not in result
+    assert result["prompt_tokens"] > 500
+    assert result["prefill_tokens_per_s"] > 0 and result["decode_tokens_per_s"] > 0
+    assert result["peak_rss_mb"] > 0
+    llm = fake_llama_cpp.instances[0]
+    assert llm.kwargs["n_gpu_layers"] == 0
+    assert llm.kwargs["n_threads"] == 4
+    assert llm.kwargs["type_k"] == KV_CACHE_TYPES["q8_0"] and llm.kwargs["flash_attn"] is True
+
+
+def test_benchmark_config_reports_errors(fake_llama_cpp, prompts):
+    results = queue.Queue()
+    tune_llm.benchmark_config("model.gguf", {"kv_cache_type": "bogus"}, prompts, 8, 1, results)
+    assert "bogus" in results.get_nowait()["error"]
+
+
+def test_main_writes_report_and_cpu_profile(tmp_path, monkeypatch):
+    def fake_run_config(model_path, settings, prompts, decode_tokens, repeats, timeout):
+        if settings["use_mlock"]:
+            return {"error": "mlock not permitted"}
+        return {"prompt_tokens": 1000, "prefill_tokens_per_s": 10.0 * settings["n_ubatch"],
+                "decode_tokens_per_s": 2.0 * settings["n_threads"], "peak_rss_mb": 100.0 * settings["n_threads"]}
+
+    monkeypatch.setattr(tune_llm, "run_config", fake_run_config)
+    report, profile = str(tmp_path / "report.json"), str(tmp_path / "profile.json")
+    assert tune_llm.main(["--model", "small.gguf", "--report", report, "--profile", profile,
+                          "--threads", "4,8", "--max-rss-mb", "500"]) == 0
+
+    results = json.load(open(report))["results"]
+    assert len(results) == len(tune_llm.build_grid(grid_args()))
+    assert sum("error" in r for r in results) == len(results) // 2
+
+    written = json.load(open(profile))
+    assert written["device"] == "cpu"
+    # 8 threads decodes faster but exceeds --max-rss-mb, so the 4-thread configuration wins.
+    assert written["settings"]["n_threads"] == 4 and written["settings"]["n_ubatch"] == 512
+    assert load_profile_settings(write_profile(tmp_path, written), model="small.gguf") == written["settings"]
+
+
+def test_main_writes_no_profile_when_everything_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(tune_llm, "run_config", lambda *args: {"error": "no llama_cpp"})
+    profile = tmp_path / "profile.json"
+    assert tune_llm.main(["--model", "small.gguf", "--report", str(tmp_path / "r.json"), "--profile", str(profile)]) == 1
+    assert not profile.exists()
+
+
+def test_load_profile_settings_filters_unknown_keys(tmp_path):
+    path = write_profile(tmp_path, {"device": "cpu", "host": {"cpu_count": os.cpu_count()},
+                                    "settings": {"n_threads": 4, "n_gpu_layers": 0}})
+    assert load_profile_settings(path) == {"n_threads": 4}
+
+
+@pytest.mark.parametrize("profile", [
+    [1, 2, 3],
+    {"settings": ["n_threads", 4]},
+    {"device": "cpu", "host": {"cpu_count": -1}, "settings": {"n_threads": 4}},
+    {"host": {"cpu_count": os.cpu_count()}, "settings": {"n_threads": 4}},
+])
+def test_load_profile_settings_ignores_invalid_or_mismatched_profiles(tmp_path, profile):
+    assert load_profile_settings(write_profile(tmp_path, profile)) == {}
+
+
+def test_load_profile_settings_skips_profile_tuned_on_another_model(tmp_path):
+    path = write_profile(tmp_path, {"device": "cpu", "model": "small.Q4_K_M.gguf", "host": {"cpu_count": os.cpu_count()},
+                                    "settings": {"n_threads": 4}})
+    assert load_profile_settings(path, model="unsloth.Q8_0.gguf") == {}
+    assert load_profile_settings(path, model="small.Q4_K_M.gguf") == {"n_threads": 4}
+
+
+def test_load_profile_settings_skips_cpu_profile_on_gpu(tmp_path):
+    path = write_profile(tmp_path, {"device": "cpu", "host": {"cpu_count": os.cpu_count()}, "settings": {"n_threads": 4}})
+    assert load_profile_settings(path, device="gpu") == {}
+
+
+def test_load_profile_settings_handles_missing_and_unreadable_files(tmp_path):
+    assert load_profile_settings(str(tmp_path / "missing.json")) == {}
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    assert load_profile_settings(str(bad)) == {}
+
+
+@pytest.mark.parametrize("kv_cache_type", ["f16", "q8_0"])
+def test_benchmark_config_with_real_llama_cpp(tmp_path, monkeypatch, prompts, kv_cache_type):
+    # Runs the real llama.cpp code path on a tiny random-weight model when llama-cpp-python and gguf are installed.
+    pytest.importorskip("llama_cpp")
+    pytest.importorskip("gguf")
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    from make_tiny_gguf import write_tiny_gguf
+
+    model_path = str(tmp_path / "tiny.gguf")
+    write_tiny_gguf(model_path, n_embd=64, n_layer=2, n_head=2, n_ff=128)
+    settings = tune_llm.build_grid(grid_args(threads=[1], threads_batch=[1], n_batch=[512], n_ubatch=[512],
+                                             kv_cache=[kv_cache_type], memory=["mmap"]))[0]
+    results = queue.Queue()
+    tune_llm.benchmark_config(model_path, settings, prompts[:1], decode_tokens=8, repeats=1, queue=results)
+    result = results.get_nowait()
+
+    assert "error" not in result, result
+    assert 500 < result["prompt_tokens"] < tune_llm.N_CTX
+    assert result["prefill_tokens_per_s"] > 0 and result["decode_tokens_per_s"] > 0
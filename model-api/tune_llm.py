@@ -0,0 +1,256 @@
+"""Benchmarks llama.cpp settings on this host and writes the fastest one to the tuning profile.
+
+Each configuration is loaded in a fresh process so peak RSS is measured per configuration.
+
+Usage: python tune_llm.py --model /path/to/small.gguf [--threads 4,8] [--kv-cache f16,q8_0]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import importlib.util
+import platform
+import resource
+import itertools
+import statistics
+import multiprocessing
+import logging
+
+from llama_profile import profile_path, llama_kwargs
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+N_CTX = 4096
+DEFAULT_REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "llama_tuning_report.json")
+MEMORY_MODES = {"mmap": (True, False), "mlock": (True, True), "no_mmap": (False, False)}
+
+# The backend builds every /predict prompt with app-backend/prompts.py; loading it here keeps prefill
+# measured on exactly the prompts real traffic sends. The model-api image ships a copy next to this file;
+# in a source checkout it is read from app-backend/.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PROMPTS_MODULE = next(
+    (p for p in (os.path.join(_HERE, "prompts.py"), os.path.join(_HERE, os.pardir, "app-backend", "prompts.py"))
+     if os.path.exists(p)),
+    os.path.join(_HERE, os.pardir, "app-backend", "prompts.py"))
+
+DDI_QUESTIONS = [
+    "What is the interaction between Warfarin and Aspirin?",
+    "Interaction between Lisinopril and Potassium supplements?",
+    "What is the interaction between Tadalafil and Fluconazole?",
+    "What is the interaction between Betaxolol and Ketorolac?",
+]
+
+
+def load_prompt_builder(path):
+    """Imports build_prompt() from the backend's prompts.py without importing the rest of the backend."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Backend prompts module not found at {path}; pass --prompts-module.")
+    spec = importlib.util.spec_from_file_location("ddi_prompts", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.build_prompt
+
+
+def parse_list(value, cast=str):
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def build_grid(args):
+    grid = []
+    for n_threads, n_threads_batch, n_batch, n_ubatch, kv_cache_type, memory in itertools.product(
+            args.threads, args.threads_batch, args.n_batch, args.n_ubatch, args.kv_cache, args.memory):
+        if n_ubatch > n_batch:
+            continue
+        use_mmap, use_mlock = MEMORY_MODES[memory]
+        grid.append({
+            "n_threads": n_threads,
+            "n_threads_batch": n_threads_batch,
+            "n_batch": n_batch,
+            "n_ubatch": n_ubatch,
+            "use_mmap": use_mmap,
+            "use_mlock": use_mlock,
+            "kv_cache_type": kv_cache_type,
+        })
+    return grid
+
+
+def benchmark_config(model_path, settings, prompts, decode_tokens, repeats, queue):
+    """Runs in a child process: loads the model with `settings` and measures prefill/decode speed."""
+    try:
+        from llama_cpp import Llama
+
+        start = time.perf_counter()
+        llm = Llama(model_path=model_path, n_ctx=N_CTX, n_gpu_layers=0, verbose=False, **llama_kwargs(settings))
+        load_seconds = time.perf_counter() - start
+
+        # Warm up so the first timed prompt doesn't pay for page faults and thread pool start-up.
+        llm.reset()
+        llm.eval(llm.tokenize(b"Warm up", add_bos=True))
+
+        prefill_rates, decode_rates, prompt_tokens = [], [], []
+        for _ in range(repeats):
+            for prompt in prompts:
+                tokens = llm.tokenize(prompt.encode("utf-8"), add_bos=True, special=True)
+                prompt_tokens.append(len(tokens))
+                llm.reset()
+                start = time.perf_counter()
+                llm.eval(tokens)
+                prefill_rates.append(len(tokens) / (time.perf_counter() - start))
+
+                generated = 0
+                start = time.perf_counter()
+                while generated < decode_tokens:
+                    token = llm.sample(temp=0.0)
+                    if token == llm.token_eos():
+                        break
+                    llm.eval([token])
+                    generated += 1
+                if generated:
+                    decode_rates.append(generated / (time.perf_counter() - start))
+
+        queue.put({
+            "load_seconds": load_seconds,
+            "prompt_tokens": statistics.mean(prompt_tokens),
+            "prefill_tokens_per_s": statistics.median(prefill_rates),
+            "decode_tokens_per_s": statistics.median(decode_rates) if decode_rates else 0.0,
+            # ru_maxrss is in KiB on Linux.
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        })
+    except Exception as e:
+        queue.put({"error": str(e)})
+
+
+def run_config(model_path, settings, prompts, decode_tokens, repeats, timeout):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=benchmark_config, args=(model_path, settings, prompts, decode_tokens, repeats, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout
+    result = None
+    # Poll rather than block so a child that crashes inside llama.cpp doesn't cost the full timeout.
+    while result is None and time.monotonic() < deadline:
+        try:
+            result = queue.get(timeout=1)
+        except Exception:
+            if not proc.is_alive() and queue.empty():
+                result = {"error": f"Benchmark process exited with code {proc.exitcode}"}
+    if result is None:
+        result = {"error": f"No result within {timeout}s"}
+    proc.join(timeout=5)
+    if proc.is_alive():
+        proc.kill()
+    return result
+
+
+def score(result, output_tokens):
+    """Estimated seconds to answer one DDI question: prefill the prompt, then decode the answer."""
+    return (result["prompt_tokens"] / result["prefill_tokens_per_s"]
+            + output_tokens / max(result["decode_tokens_per_s"], 1e-9))
+
+
+def host_info():
+    try:
+        import llama_cpp
+        llama_cpp_version = llama_cpp.__version__
+    except ImportError:
+        llama_cpp_version = None
+    return {
+        "hostname": platform.node(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "llama_cpp_python": llama_cpp_version,
+    }
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None):
+    cpu_count = os.cpu_count() or 1
+    default_threads = ",".join(str(t) for t in sorted({max(1, cpu_count // 2), cpu_count}))
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=os.environ.get("TUNE_MODEL_PATH"),
+                        help="Local GGUF file. Defaults to the model downloaded from GCS_MODEL_PATH.")
+    parser.add_argument("--threads", type=lambda v: parse_list(v, int), default=parse_list(default_threads, int))
+    parser.add_argument("--threads-batch", type=lambda v: parse_list(v, int), default=[cpu_count])
+    parser.add_argument("--n-batch", type=lambda v: parse_list(v, int), default=[256, 512])
+    parser.add_argument("--n-ubatch", type=lambda v: parse_list(v, int), default=[128, 512])
+    parser.add_argument("--kv-cache", type=parse_list, default=["f16", "q8_0"])
+    parser.add_argument("--memory", type=parse_list, default=["mmap", "mlock"],
+                        help=f"Comma-separated subset of {list(MEMORY_MODES)}.")
+    parser.add_argument("--decode-tokens", type=int, default=64, help="Tokens generated per prompt when timing decode.")
+    parser.add_argument("--output-tokens", type=int, default=300, help="Typical answer length used to rank configurations.")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="Discard configurations above this peak RSS.")
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds allowed per configuration.")
+    parser.add_argument("--profile", default=profile_path())
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH)
+    parser.add_argument("--prompts-module", default=os.environ.get("TUNE_PROMPTS_MODULE", DEFAULT_PROMPTS_MODULE),
+                        help="Path to app-backend/prompts.py, used to build the benchmark prompts.")
+    args = parser.parse_args(argv)
+
+    for memory in args.memory:
+        if memory not in MEMORY_MODES:
+            parser.error(f"Unknown memory mode {memory!r}, expected one of {list(MEMORY_MODES)}")
+    build_prompt = load_prompt_builder(args.prompts_module)
+    prompts = [build_prompt(q) for q in DDI_QUESTIONS]
+    if not args.model:
+        from main import download_model_from_gcs
+        args.model = download_model_from_gcs()
+
+    grid = build_grid(args)
+    logger.info(f"Benchmarking {len(grid)} configurations of {args.model}")
+
+    results = []
+    for i, settings in enumerate(grid, 1):
+        result = run_config(args.model, settings, prompts, args.decode_tokens, args.repeats, args.timeout)
+        result["settings"] = settings
+        if "error" not in result:
+            result["est_seconds_per_answer"] = score(result, args.output_tokens)
+            logger.info(f"[{i}/{len(grid)}] {settings}: prefill {result['prefill_tokens_per_s']:.1f} tok/s, "
+                        f"decode {result['decode_tokens_per_s']:.1f} tok/s, peak RSS {result['peak_rss_mb']:.0f} MB")
+        else:
+            logger.warning(f"[{i}/{len(grid)}] {settings}: failed: {result['error']}")
+        results.append(result)
+
+    candidates = [r for r in results if "error" not in r
+                  and (args.max_rss_mb is None or r["peak_rss_mb"] <= args.max_rss_mb)]
+    report = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "model": os.path.basename(args.model),
+        "host": host_info(),
+        "n_ctx": N_CTX,
+        "output_tokens": args.output_tokens,
+        "max_rss_mb": args.max_rss_mb,
+        "results": sorted(results, key=lambda r: r.get("est_seconds_per_answer", float("inf"))),
+    }
+    write_json(args.report, report)
+    logger.info(f"Wrote benchmark report to {args.report}")
+
+    if not candidates:
+        logger.error("No configuration completed successfully; profile not written.")
+        return 1
+    best = min(candidates, key=lambda r: r["est_seconds_per_answer"])
+    write_json(args.profile, {
+        "created": report["created"],
+        "model": report["model"],
+        # Benchmarks run with n_gpu_layers=0, so the profile only applies to CPU inference.
+        "device": "cpu",
+        "host": report["host"],
+        "settings": best["settings"],
+        "metrics": {k: v for k, v in best.items() if k != "settings"},
+    })
+    logger.info(f"Best configuration {best['settings']} written to {args.profile}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())